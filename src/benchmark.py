@@ -0,0 +1,234 @@
+import argparse
+import io
+import json
+import platform
+from datetime import datetime
+from time import perf_counter
+from typing import Callable, Dict, List
+
+import cairo
+import numpy as np
+
+from src.clipping import Clipper, LineClipping
+from src.display_file import DisplayFile
+from src.drawing import Pencil
+from src.model import Bezier, Bspline, Coordinate, Curve, Size, Wireframe
+from src.render import render
+from src.viewport import Viewport
+from src.wavefront import import_obj
+
+SIZE = Size(800, 600)
+
+
+def best_of(f: Callable[[], object], repeat: int) -> float:
+    best = float('inf')
+
+    for _ in range(repeat):
+        start = perf_counter()
+        f()
+        best = min(best, perf_counter() - start)
+
+    return best
+
+
+def random_segments(n: int, low: float, high: float, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).uniform(low, high, (n, 2, 2))
+
+
+def compare_line_clipping(n: int = 100_000, scalar_n: int = 10_000, repeat: int = 5) -> Dict[str, float]:
+    vmin = Coordinate(0, 0)
+    vmax = Coordinate(800, 600)
+
+    segments = random_segments(n, -400, 1200)
+    scalar_segments = [
+        (Coordinate(x0, y0), Coordinate(x1, y1))
+        for (x0, y0), (x1, y1) in segments[:scalar_n]
+    ]
+
+    results = {}
+
+    for line_clipping in LineClipping:
+        clipper = Clipper(vmin, vmax, line_clipping)
+        name = line_clipping.name.lower()
+
+        results[f'{name}_scalar'] = best_of(
+            lambda: [clipper.clip_line(c0, c1) for c0, c1 in scalar_segments],
+            repeat,
+        ) * (n / scalar_n)
+
+        results[f'{name}_batch'] = best_of(
+            lambda: clipper.clip_segments(segments),
+            repeat,
+        )
+
+    return results
+
+
+def random_obj(n: int, per_object: int = 16, seed: int = 0) -> bytes:
+    lines = []
+
+    for i, walk in enumerate(random_walks(n // per_object, per_object, 10, seed)):
+        lines.extend(f'v {x:.6f} {y:.6f} 0' for x, y in walk.tolist())
+        lines.append('l ' + ' '.join(str(i * per_object + j) for j in range(1, per_object + 1)))
+
+    return '\n'.join(lines).encode()
+
+
+def obj_parse_throughput(n: int = 100_000, repeat: int = 5) -> float:
+    data = random_obj(n)
+
+    seconds = best_of(lambda: import_obj(io.BytesIO(data), DisplayFile()), repeat)
+    return n / seconds
+
+
+def random_walks(n: int, per_object: int, step: float, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    starts = rng.uniform(-600, 600, (n, 1, 2))
+    return starts + np.cumsum(rng.uniform(-step, step, (n, per_object, 2)), axis=1)
+
+
+def polylines_scene(n: int, per_object: int = 32, seed: int = 0) -> DisplayFile:
+    xy = random_walks(n, per_object, 20, seed)
+    return _scene(Wireframe(str(i), _homogeneous(v)) for i, v in enumerate(xy))
+
+
+def polygon_scene(n: int, seed: int = 0) -> DisplayFile:
+    # one closed polygon with n vertices, larger than the window so most edges get clipped
+    rng = np.random.default_rng(seed)
+    theta = np.linspace(0, 2 * np.pi, n, endpoint=False)
+    radius = rng.uniform(300, 500, n)
+    xy = np.column_stack([radius * np.cos(theta), radius * np.sin(theta)])
+
+    return _scene([Wireframe('0', _homogeneous(np.vstack([xy, xy[:1]])))])
+
+
+def curves_scene(n: int, seed: int = 0) -> DisplayFile:
+    xy = random_walks(n, 7, 50, seed)
+    return _scene(
+        Bezier(str(i), _homogeneous(v)) if i % 2 == 0 else Bspline(str(i), _homogeneous(v))
+        for i, v in enumerate(xy)
+    )
+
+
+def offscreen_scene(n: int, visible: float = 0.05, per_object: int = 32, seed: int = 0) -> DisplayFile:
+    xy = random_walks(n, per_object, 20, seed)
+    rng = np.random.default_rng(seed)
+
+    # push all but a fraction of the objects far outside the window
+    far = rng.uniform(5_000, 50_000, (n, 1, 2)) * rng.choice([-1, 1], (n, 1, 2))
+    far[rng.uniform(size=n) < visible] = 0
+
+    return _scene(Wireframe(str(i), _homogeneous(v)) for i, v in enumerate(xy + far))
+
+
+SCENES: Dict[str, Callable[[int], DisplayFile]] = {
+    'polylines': lambda n: polylines_scene(n // 32),
+    'polygon': polygon_scene,
+    'curves': lambda n: curves_scene(n // 7),
+    'offscreen': lambda n: offscreen_scene(n // 32),
+}
+
+
+def time_pipeline(df: DisplayFile, vp: Viewport, repeat: int = 5) -> Dict[str, float]:
+    clipper = Clipper(vp.cmin, vp.cmax)
+    surface = cairo.ImageSurface(cairo.FORMAT_RGB24, int(vp.vmax.x), int(vp.vmax.y))
+
+    def transform():
+        transformed = vp.transform_wireframes(visible)
+        # transformations are lazy, so read the vertices. Curves are tessellated from
+        # their control points instead, which is timed separately
+        for w in transformed:
+            if not isinstance(w, Curve):
+                w.vertices
+        return transformed
+
+    def tessellate():
+        Curve.tessellation_cache.clear()
+        return [w.curve() for w in transformed if isinstance(w, Curve)]
+
+    def end_to_end():
+        Curve.tessellation_cache.clear()
+        render(Pencil(surface), df, vp)
+        surface.flush()
+
+    def draw():
+        Pencil(surface).draw_wireframes(clipped)
+        surface.flush()
+
+    visible = df.query(*vp.world_bounds)
+    transformed = transform()
+    clipped = clipper.clip_all(transformed)
+
+    return {
+        'query': best_of(lambda: df.query(*vp.world_bounds), repeat),
+        'transform': best_of(transform, repeat),
+        'tessellate': best_of(tessellate, repeat),
+        # the tessellation cache is warm here, so curves only pay for the lookup
+        'clip': best_of(lambda: clipper.clip_all(transformed), repeat),
+        'draw': best_of(draw, repeat),
+        'end_to_end': best_of(end_to_end, repeat),
+    }
+
+
+def compare_pipeline(n: int = 100_000, repeat: int = 5) -> Dict[str, Dict[str, float]]:
+    vp = Viewport(SIZE, None)
+    return {name: time_pipeline(make_scene(n), vp, repeat) for name, make_scene in SCENES.items()}
+
+
+def _scene(wireframes) -> DisplayFile:
+    df = DisplayFile()
+    df.add_many(wireframes)
+    df.current_id = len(df)
+    return df
+
+
+def _homogeneous(xy: np.ndarray) -> np.ndarray:
+    return np.column_stack([xy, np.ones(len(xy))])
+
+
+def _environment() -> Dict[str, str]:
+    return {
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'cairo': cairo.cairo_version_string(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Time the transform, clip and draw pipeline')
+    parser.add_argument('-n', type=int, default=100_000, help='number of segments/vertices per benchmark')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--json', type=argparse.FileType('w'), help='also write the results to this file')
+    args = parser.parse_args()
+
+    line_clipping = compare_line_clipping(n=args.n, scalar_n=min(args.n, 10_000), repeat=args.repeat)
+
+    for name, seconds in sorted(line_clipping.items(), key=lambda item: item[1]):
+        print(f'{name:<24} {seconds * 1000:10.2f} ms  ({args.n / seconds:,.0f} segments/s)')
+
+    obj_parse = obj_parse_throughput(n=args.n, repeat=args.repeat)
+    print(f'{"obj_parse":<24} {obj_parse:,.0f} vertices/s')
+
+    pipeline = compare_pipeline(n=args.n, repeat=args.repeat)
+    stages: List[str] = list(next(iter(pipeline.values())))
+
+    print()
+    print(f'{"scene":<12}' + ''.join(f'{stage:>12}' for stage in stages) + '  (ms)')
+    for scene, timings in pipeline.items():
+        print(f'{scene:<12}' + ''.join(f'{timings[stage] * 1000:12.2f}' for stage in stages))
+
+    if args.json is not None:
+        json.dump({
+            'environment': _environment(),
+            'parameters': {'n': args.n, 'repeat': args.repeat},
+            'line_clipping': line_clipping,
+            'obj_parse_vertices_per_second': obj_parse,
+            'pipeline': pipeline,
+        }, args.json, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,7 @@
 from enum import Enum, auto
-from typing import List
+from typing import List, Tuple
+
+import numpy as np
 
 from src.model import Coordinate, Curve, Wireframe
 
@@ -10,16 +12,38 @@ BOTTOM = 4  # 0100
 TOP = 8  # 1000
 
 
+class LineClipping(Enum):
+    COHEN_SUTHERLAND = auto()
+    LIANG_BARSKY = auto()
+
+
+class PolygonClipping(Enum):
+    SUTHERLAND_HODGMAN = auto()
+    WEILER_ATHERTON = auto()
+
+
 class Clipper:
-    def __init__(self, vmin: Coordinate, vmax: Coordinate):
+    def __init__(self, vmin: Coordinate, vmax: Coordinate,
+                 line_clipping: LineClipping = LineClipping.COHEN_SUTHERLAND,
+                 polygon_clipping: PolygonClipping = PolygonClipping.SUTHERLAND_HODGMAN):
         self.vmin = vmin
         self.vmax = vmax
+        self.line_clipping = line_clipping
+        self.polygon_clipping = polygon_clipping
 
     def clip(self, wireframe: Wireframe) -> List[Wireframe]:
+        bmin, bmax = wireframe.bounds
+
+        if not self.overlaps(bmin, bmax):
+            return []
+
         if isinstance(wireframe, Curve):
             wireframe = wireframe.curve()
 
-        wlen = len(wireframe.coordinates)
+        if self.contains(bmin, bmax):
+            return [wireframe]
+
+        wlen = len(wireframe.vertices)
 
         if wlen == 1:
             inside, coord = self.clip_point(wireframe.coordinates[0])
@@ -31,7 +55,47 @@ class Clipper:
         if not wireframe.is_closed:
             return self.clip_lines(wireframe)
 
-        return self.weiler_atherton(wireframe)
+        if self.polygon_clipping == PolygonClipping.WEILER_ATHERTON:
+            return self.weiler_atherton(wireframe)
+
+        return self.sutherland_hodgman(wireframe)
+
+    def clip_all(self, wireframes: List[Wireframe]) -> List[Wireframe]:
+        visible = []
+
+        for w in wireframes:
+            bmin, bmax = w.bounds
+
+            if self.overlaps(bmin, bmax):
+                if isinstance(w, Curve):
+                    w = w.curve()
+
+                visible.append((w, self.contains(bmin, bmax)))
+
+        polylines = [
+            w for w, contained in visible
+            if not contained and len(w.vertices) > 1 and not w.is_closed
+        ]
+        clipped_polylines = iter(self._clip_polylines(polylines))
+
+        out = []
+
+        for w, contained in visible:
+            if contained:
+                out.append(w)
+            elif len(w.vertices) > 1 and not w.is_closed:
+                out.extend(next(clipped_polylines))
+            else:
+                out.extend(self.clip(w))
+
+        return out
+
+    def overlaps(self, bmin: Coordinate, bmax: Coordinate):
+        return (bmin.x <= self.vmax.x and bmax.x >= self.vmin.x
+                and bmin.y <= self.vmax.y and bmax.y >= self.vmin.y)
+
+    def contains(self, bmin: Coordinate, bmax: Coordinate):
+        return self.inside(bmin) and self.inside(bmax)
 
     def inside(self, coord: Coordinate):
         return (self.vmin.x <= coord.x <= self.vmax.x
@@ -42,6 +106,22 @@ class Clipper:
             return True, coord
         return False, None
 
+    def clip_line(self, c0: Coordinate, c1: Coordinate):
+        if self.line_clipping == LineClipping.LIANG_BARSKY:
+            return self.liang_barsky(c0, c1)
+
+        return self.cohen_sutherland(c0, c1)
+
+    def clip_segments(self, segments: np.ndarray) -> np.ndarray:
+        accepted, clipped = self._clip_segments_batch(segments)
+        return clipped[accepted]
+
+    def _clip_segments_batch(self, segments: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        if self.line_clipping == LineClipping.LIANG_BARSKY:
+            return self._liang_barsky_batch(segments)
+
+        return self._cohen_sutherland_batch(segments)
+
     def cohen_sutherland(self, c0: Coordinate, c1: Coordinate):
         while True:
             code0 = self._code(c0)
@@ -82,11 +162,150 @@ class Clipper:
                 else:
                     c1 = Coordinate(x, y)
 
+    def _cohen_sutherland_batch(self, segments: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        # segments is (M, 2, 2): M segments of two (x, y) endpoints
+        segments = np.array(segments, dtype=float).reshape(-1, 2, 2)
+
+        accepted = np.zeros(len(segments), dtype=bool)
+        pending = np.ones(len(segments), dtype=bool)
+
+        while pending.any():
+            idx = np.flatnonzero(pending)
+            c0 = segments[idx, 0]
+            c1 = segments[idx, 1]
+
+            code0 = self._codes(c0)
+            code1 = self._codes(c1)
+
+            accept = (code0 | code1) == 0
+            reject = (code0 & code1) != 0
+
+            accepted[idx[accept]] = True
+            pending[idx[accept | reject]] = False
+
+            clip = ~(accept | reject)
+            idx, c0, c1, code0, code1 = idx[clip], c0[clip], c1[clip], code0[clip], code1[clip]
+
+            first = code0 != 0
+            out = np.where(first, code0, code1)
+
+            x0, y0 = c0[:, 0], c0[:, 1]
+            x1, y1 = c1[:, 0], c1[:, 1]
+
+            with np.errstate(divide='ignore', invalid='ignore'):
+                x = np.select(
+                    [(out & TOP) != 0, (out & BOTTOM) != 0, (out & RIGHT) != 0],
+                    [
+                        x0 + (x1 - x0) * (self.vmin.y - y0) / (y1 - y0),
+                        x0 + (x1 - x0) * (self.vmax.y - y0) / (y1 - y0),
+                        self.vmax.x,
+                    ],
+                    self.vmin.x,
+                )
+                y = np.select(
+                    [(out & TOP) != 0, (out & BOTTOM) != 0, (out & RIGHT) != 0],
+                    [
+                        self.vmin.y,
+                        self.vmax.y,
+                        y0 + (y1 - y0) * (self.vmax.x - x0) / (x1 - x0),
+                    ],
+                    y0 + (y1 - y0) * (self.vmin.x - x0) / (x1 - x0),
+                )
+
+            segments[idx, np.where(first, 0, 1)] = np.stack([x, y], axis=1)
+
+        return accepted, segments
+
+    def liang_barsky(self, c0: Coordinate, c1: Coordinate):
+        dx = c1.x - c0.x
+        dy = c1.y - c0.y
+
+        p = (-dx, dx, -dy, dy)
+        q = (c0.x - self.vmin.x, self.vmax.x - c0.x, c0.y - self.vmin.y, self.vmax.y - c0.y)
+
+        t0 = 0
+        t1 = 1
+
+        for pk, qk in zip(p, q):
+            if pk == 0:
+                if qk < 0:
+                    return False, None, None
+
+            elif pk < 0:
+                t0 = max(t0, qk / pk)
+
+            else:
+                t1 = min(t1, qk / pk)
+
+        if t0 > t1:
+            return False, None, None
+
+        nc0 = c0 if t0 == 0 else Coordinate(c0.x + t0 * dx, c0.y + t0 * dy)
+        nc1 = c1 if t1 == 1 else Coordinate(c0.x + t1 * dx, c0.y + t1 * dy)
+
+        return True, nc0, nc1
+
+    def _liang_barsky_batch(self, segments: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        segments = np.asarray(segments, dtype=float).reshape(-1, 2, 2)
+
+        c0 = segments[:, 0]
+        c1 = segments[:, 1]
+        d = c1 - c0
+
+        p = np.stack([-d[:, 0], d[:, 0], -d[:, 1], d[:, 1]], axis=1)
+        q = np.stack([
+            c0[:, 0] - self.vmin.x,
+            self.vmax.x - c0[:, 0],
+            c0[:, 1] - self.vmin.y,
+            self.vmax.y - c0[:, 1],
+        ], axis=1)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            r = q / p
+
+        t0 = np.maximum(0, np.where(p < 0, r, -np.inf).max(axis=1))
+        t1 = np.minimum(1, np.where(p > 0, r, np.inf).min(axis=1))
+
+        parallel_outside = ((p == 0) & (q < 0)).any(axis=1)
+        accepted = ~parallel_outside & (t0 <= t1)
+
+        # untouched endpoints are kept exactly so that clip_lines can join them back
+        clipped = np.stack([
+            np.where((t0 == 0)[:, None], c0, c0 + t0[:, None] * d),
+            np.where((t1 == 1)[:, None], c1, c0 + t1[:, None] * d),
+        ], axis=1)
+
+        return accepted, clipped
+
+    def sutherland_hodgman(self, wireframe: Wireframe):
+        # the last vertex of a closed wireframe repeats the first one
+        points = wireframe.vertices[:-1, :2]
+
+        for axis, bound, keep_above in ((0, self.vmin.x, True),
+                                        (0, self.vmax.x, False),
+                                        (1, self.vmin.y, True),
+                                        (1, self.vmax.y, False)):
+            if len(points) == 0:
+                return []
+
+            points = _clip_polygon_edge(points, axis, bound, keep_above)
+
+        if len(points) == 0:
+            return []
+
+        points = np.concatenate([points, points[:1]])
+
+        return [
+            wireframe.copy(
+                vertices=np.column_stack([points, np.ones(len(points))])
+            )
+        ]
+
     def weiler_atherton(self, wireframe: Wireframe):
         subject = [(c, _Type.ORIGINAL) for c in wireframe.coordinates]
 
         for i, (c0, c1) in enumerate(wireframe.lines):
-            inside, nc0, nc1 = self.cohen_sutherland(c0, c1)
+            inside, nc0, nc1 = self.clip_line(c0, c1)
 
             if inside:
                 if c1 != nc1:
@@ -139,19 +358,57 @@ class Clipper:
 
         return code
 
-    def clip_lines(self, wireframe: Wireframe):
-        new_wireframes = []
+    def _codes(self, points: np.ndarray) -> np.ndarray:
+        x = points[:, 0]
+        y = points[:, 1]
 
-        for c0, c1 in wireframe.lines:
-            inside, nc0, nc1 = self.cohen_sutherland(c0, c1)
-            if inside:
-                new_wireframes.append(
-                    wireframe.copy(
-                        coordinates=[nc0, nc1]
-                    )
+        horizontal = np.where(x < self.vmin.x, LEFT, np.where(x > self.vmax.x, RIGHT, CENTER))
+        vertical = np.where(y < self.vmin.y, TOP, np.where(y > self.vmax.y, BOTTOM, CENTER))
+
+        return horizontal | vertical
+
+    def clip_lines(self, wireframe: Wireframe):
+        return self._clip_polylines([wireframe])[0]
+
+    def _clip_polylines(self, wireframes: List[Wireframe]) -> List[List[Wireframe]]:
+        out = [[] for _ in wireframes]
+
+        if len(wireframes) == 0:
+            return out
+
+        vertices = [w.vertices[:, :2] for w in wireframes]
+        segments = np.concatenate([
+            np.stack([v[:-1], v[1:]], axis=1)
+            for v in vertices
+        ])
+        owners = np.repeat(np.arange(len(wireframes)), [len(v) - 1 for v in vertices])
+
+        accepted, clipped = self._clip_segments_batch(segments)
+
+        indices = np.flatnonzero(accepted)
+        if len(indices) == 0:
+            return out
+
+        owners = owners[indices]
+        clipped = clipped[indices]
+
+        # consecutive surviving segments that share an unclipped vertex form one polyline
+        continues = (
+            (np.diff(indices) == 1)
+            & (np.diff(owners) == 0)
+            & (clipped[:-1, 1] == clipped[1:, 0]).all(axis=1)
+        )
+        breaks = np.flatnonzero(~continues) + 1
+
+        for owner, run in zip(owners[np.r_[0, breaks]], np.split(clipped, breaks)):
+            points = np.concatenate([run[:, 0], run[-1:, 1]])
+            out[owner].append(
+                wireframes[owner].copy(
+                    vertices=np.column_stack([points, np.ones(len(points))])
                 )
+            )
 
-        return new_wireframes
+        return out
 
 
 class _Type(Enum):
@@ -160,6 +417,33 @@ class _Type(Enum):
     EXITING = auto()
 
 
+def _clip_polygon_edge(points: np.ndarray, axis: int, bound: float, keep_above: bool) -> np.ndarray:
+    following = np.roll(points, -1, axis=0)
+
+    if keep_above:
+        inside = points[:, axis] >= bound
+    else:
+        inside = points[:, axis] <= bound
+
+    following_inside = np.roll(inside, -1)
+    crossing = inside != following_inside
+
+    # each edge emits its intersection (if it crosses) followed by its end (if inside)
+    counts = crossing.astype(int) + following_inside
+    starts = np.cumsum(counts) - counts
+
+    out = np.empty((counts.sum(), 2))
+
+    p = points[crossing]
+    q = following[crossing]
+    t = (bound - p[:, axis]) / (q[:, axis] - p[:, axis])
+
+    out[starts[crossing]] = p + t[:, None] * (q - p)
+    out[(starts + crossing)[following_inside]] = following[following_inside]
+
+    return out
+
+
 def _cycle(lst):
     i = 0
     size = len(lst)
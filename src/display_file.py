@@ -1,43 +1,95 @@
-from typing import List
+from enum import Enum, auto
+from itertools import count
+from typing import Callable, Dict, Iterable, List, Optional
 
-from src.model import Wireframe
+import numpy as np
+
+from src.model import Coordinate, Wireframe
+from src.spatial_index import SpatialIndex
+
+
+class Change(Enum):
+    ADDED = auto()
+    REMOVED = auto()
+    REPLACED = auto()
+    RESET = auto()
 
 
 class DisplayFile:
-    def __init__(self):
-        self.wireframes: List[Wireframe] = []
+    def __init__(self, on_changed: Callable[[Change, Optional[str], Optional[Wireframe]], None] = None):
+        # dicts keep insertion order, and replacing a key keeps its position
+        self._wireframes: Dict[str, Wireframe] = {}
+        self._order: Dict[str, int] = {}
+        self._sequence = count()
+
         self.current_id = 0
+        self.index = SpatialIndex()
+
+        self.on_changed = on_changed
+
+    @property
+    def wireframes(self) -> List[Wireframe]:
+        return list(self._wireframes.values())
 
     def add(self, wireframe: Wireframe):
         if wireframe is not None:
-            self.wireframes.append(wireframe)
+            if wireframe.id not in self._order:
+                self._order[wireframe.id] = next(self._sequence)
+
+            self._wireframes[wireframe.id] = wireframe
+            self.index.insert(wireframe.id, *wireframe.bounds)
+            self._notify(Change.ADDED, wireframe.id, wireframe)
+
+    def add_many(self, wireframes: Iterable[Wireframe]):
+        for wireframe in wireframes:
+            self.add(wireframe)
 
     def remove(self, oid):
-        self.wireframes = [
-            o
-            for o in self.wireframes
-            if o.id != oid
-        ]
+        wireframe = self._wireframes.pop(oid, None)
+
+        if wireframe is not None:
+            del self._order[oid]
+            self.index.remove(oid)
+            self._notify(Change.REMOVED, oid, wireframe)
+
+    def remove_many(self, oids: Iterable[str]):
+        for oid in oids:
+            self.remove(oid)
 
     def replace(self, oid, wireframe):
-        for i, w in enumerate(self.wireframes):
-            if w.id == oid:
-                self.wireframes[i] = wireframe
-                break
+        if oid in self._wireframes:
+            self._wireframes[oid] = wireframe
+            self.index.insert(oid, *wireframe.bounds)
+            self._notify(Change.REPLACED, oid, wireframe)
+
+    def query(self, wmin: Coordinate, wmax: Coordinate) -> List[Wireframe]:
+        oids = sorted(self.index.query(wmin, wmax), key=self._order.__getitem__)
+        return [self._wireframes[oid] for oid in oids]
+
+    def transform(self, oids: Iterable[str], t: np.ndarray):
+        for oid in oids:
+            self.replace(oid, self[oid].transform(t))
 
     def reset(self):
-        self.__init__()
+        self.__init__(self.on_changed)
+        self._notify(Change.RESET, None, None)
 
     def next_id(self):
         self.current_id += 1
         return f'{self.current_id - 1}'
 
+    def _notify(self, change: Change, oid: Optional[str], wireframe: Optional[Wireframe]):
+        if self.on_changed is not None:
+            self.on_changed(change, oid, wireframe)
+
     def __getitem__(self, oid):
-        for obj in self.wireframes:
-            if obj.id == oid:
-                return obj
+        return self._wireframes[oid]
+
+    def __contains__(self, oid):
+        return oid in self._wireframes
 
-        raise KeyError
+    def __len__(self):
+        return len(self._wireframes)
 
     def __iter__(self):
-        return iter(self.wireframes)
+        return iter(self._wireframes.values())
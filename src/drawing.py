@@ -1,10 +1,14 @@
 from math import pi
+from typing import Dict, Iterable, List, Tuple
 
 import cairo
+import numpy as np
 
 from src.colors import Color
 from src.model import Coordinate, Wireframe
 
+BLACK = (0, 0, 0, 1)
+
 
 class Pencil:
     def __init__(self, surface):
@@ -22,11 +26,57 @@ class Pencil:
         else:
             self.ctx.set_source_rgb(0, 0, 0)
 
-        if len(wireframe.coordinates) == 1:
+        if len(wireframe.vertices) == 0:
+            return
+
+        if len(wireframe.vertices) == 1:
             self.draw_point(wireframe.coordinates[0])
         else:
-            for line in wireframe.lines:
-                self._draw_line(*line)
+            self._polyline(wireframe.vertices)
+            self.ctx.stroke()
+
+    def draw_wireframes(self, wireframes: Iterable[Wireframe]):
+        # one path per color: every polyline is stroked, and every point filled, at once
+        groups: Dict[Tuple[float, ...], Tuple[List[np.ndarray], List[np.ndarray]]] = {}
+
+        for wireframe in wireframes:
+            if len(wireframe.vertices) == 0:
+                continue
+
+            rgba = BLACK if wireframe.color is None else tuple(wireframe.color.to_list())
+            polylines, points = groups.setdefault(rgba, ([], []))
+
+            if len(wireframe.vertices) == 1:
+                points.append(wireframe.vertices[0])
+            else:
+                polylines.append(wireframe.vertices)
+
+        for rgba, (polylines, points) in groups.items():
+            self.ctx.set_source_rgba(*rgba)
+
+            if len(polylines) != 0:
+                for vertices in polylines:
+                    self._polyline(vertices)
+                self.ctx.stroke()
+
+            if len(points) != 0:
+                for x, y, _ in points:
+                    self.ctx.new_sub_path()
+                    self.ctx.arc(x, y, 2, 0, 2 * pi)
+                self.ctx.fill()
+
+    def draw_segments(self, segments: np.ndarray, color: Color):
+        self.color(color)
+
+        for (x0, y0), (x1, y1) in segments.tolist():
+            self.ctx.move_to(x0, y0)
+            self.ctx.line_to(x1, y1)
+
+        self.ctx.stroke()
+
+    def paint(self, surface):
+        self.ctx.set_source_surface(surface, 0, 0)
+        self.ctx.paint()
 
     def line_width(self, width):
         self.ctx.set_line_width(width)
@@ -34,7 +84,12 @@ class Pencil:
     def color(self, color: Color):
         self.ctx.set_source_rgba(*color.to_list())
 
-    def _draw_line(self, c0: Coordinate, c1: Coordinate):
-        self.ctx.move_to(c0.x, c0.y)
-        self.ctx.line_to(c1.x, c1.y)
-        self.ctx.stroke()
+    def _polyline(self, vertices: np.ndarray):
+        if len(vertices) == 0:
+            return
+
+        (x, y), *rest = vertices[:, :2].tolist()
+
+        self.ctx.move_to(x, y)
+        for x, y in rest:
+            self.ctx.line_to(x, y)
@@ -0,0 +1,53 @@
+import cairo
+
+from src.clipping import Clipper
+from src.colors import Color
+from src.drawing import Pencil
+from src.model import Coordinate
+from src.viewport import Viewport
+
+
+class GridLayer:
+    def __init__(self):
+        self.surface = None
+        self.renders = 0
+
+        self._key = None
+
+    def paint(self, pencil: Pencil, vp: Viewport):
+        key = (
+            tuple(vp.wmin.v), tuple(vp.wmax.v), vp.angle,
+            tuple(vp.vmax.v), tuple(vp.cmin.v), tuple(vp.cmax.v),
+        )
+
+        # only window changes invalidate the layer, scene edits reuse it as is
+        if key != self._key:
+            self._render(vp)
+            self._key = key
+
+        pencil.paint(self.surface)
+
+    def draw(self, pencil: Pencil, vp: Viewport):
+        pencil.ctx.save()
+
+        pencil.ctx.set_source_rgb(1, 1, 1)
+        pencil.ctx.paint()
+
+        clipper = Clipper(vp.cmin, vp.cmax)
+
+        for color, segments in vp.get_grid():
+            pencil.draw_segments(clipper.clip_segments(segments), color)
+
+        origin = vp.transform_coordinate(Coordinate(0, 0))
+        if clipper.inside(origin):
+            pencil.line_width(10)
+            pencil.color(Color(0, 0, 0, 0.5))
+            pencil.draw_point(origin)
+
+        pencil.ctx.restore()
+
+    def _render(self, vp: Viewport):
+        self.surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, int(vp.vmax.x), int(vp.vmax.y))
+        self.renders += 1
+
+        self.draw(Pencil(self.surface), vp)
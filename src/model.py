@@ -1,18 +1,32 @@
-from dataclasses import dataclass, field, replace
-from math import cos, sin
-from typing import List, Tuple
+from copy import copy
+from dataclasses import dataclass
+from functools import lru_cache
+from math import ceil, cos, factorial, inf, log2, sin, sqrt
+from typing import List, Sequence, Tuple, Union
 
 import numpy as np
-from sympy import Matrix
 
 from src.colors import Color
+from src.tessellation import TessellationCache
+
+# maximum distance, in the curve's output units, between a curve and its tessellation
+FLATNESS_TOLERANCE = 0.5
+MAX_STEPS = 1024
 
 
 class Coordinate:
+    __slots__ = ('v',)
+
     @staticmethod
     def from_array(v: np.array):
         return Coordinate(v[0], v[1])
 
+    @staticmethod
+    def view(v: np.ndarray):
+        coordinate = Coordinate.__new__(Coordinate)
+        coordinate.v = v
+        return coordinate
+
     def __init__(self, x: float, y: float, w: float = 1):
         self.v = np.array([x, y, w], dtype=float)
 
@@ -74,25 +88,93 @@ class Coordinate:
         return str(self)
 
 
-@dataclass
 class Wireframe:
-    id: str
-    coordinates: List[Coordinate] = field(default_factory=list)
-    color: Color = None
+    def __init__(self,
+                 id: str,
+                 coordinates: Union[Sequence[Coordinate], np.ndarray] = (),
+                 color: Color = None,
+                 bounds: Tuple[Coordinate, Coordinate] = None):
+        self.id = id
+        self.vertices = coordinates
+        self.color = color
+
+        if bounds is not None:
+            # known bounds (e.g. stored in a scene file) spare reading every vertex
+            bmin, bmax = bounds
+            self._extent = np.array([[bmin.x, bmin.y, 1], [bmax.x, bmax.y, 1]])
 
     def copy(self, **changes):
-        return replace(self, **changes)
+        new = copy(self)
+
+        for name, value in changes.items():
+            if name == 'coordinates':
+                name = 'vertices'
+            elif not hasattr(self, name):
+                raise TypeError(f'{type(self).__name__} has no attribute {name!r}')
+
+            setattr(new, name, value)
+
+        return new
+
+    @property
+    def vertices(self) -> np.ndarray:
+        # pending transformations are only applied when the vertices are read
+        if self._transformation is not None:
+            self._vertices = _as_vertices(self._vertices @ self._transformation, owned=True)
+            if self._centroid is not None:
+                self._centroid = self._centroid @ self._transformation
+            self._transformation = None
+            self._extent = None
+
+        return self._vertices
+
+    @vertices.setter
+    def vertices(self, coordinates: Union[Sequence[Coordinate], np.ndarray]):
+        self._vertices = _as_vertices(coordinates)
+        self._transformation = None
+        self._centroid = None
+        self._extent = None
+
+    @property
+    def bounds(self) -> Tuple[Coordinate, Coordinate]:
+        if len(self._vertices) == 0:
+            # an empty box, min above max, which overlaps nothing
+            return Coordinate(inf, inf), Coordinate(-inf, -inf)
+
+        if self._extent is None:
+            self._extent = np.array([
+                self._vertices.min(axis=0),
+                self._vertices.max(axis=0),
+            ])
+
+        (xmin, ymin, _), (xmax, ymax, _) = self._extent
+
+        if self._transformation is not None:
+            # bounds of the transformed box corners, so the vertices stay untouched
+            corners = np.array([
+                [xmin, ymin, 1],
+                [xmax, ymin, 1],
+                [xmax, ymax, 1],
+                [xmin, ymax, 1],
+            ]) @ self._transformation
+
+            xmin, ymin, _ = corners.min(axis=0)
+            xmax, ymax, _ = corners.max(axis=0)
+
+        return Coordinate(xmin, ymin), Coordinate(xmax, ymax)
+
+    @property
+    def coordinates(self) -> List[Coordinate]:
+        return [Coordinate.view(v) for v in self.vertices]
 
     @staticmethod
     def line(oid, xy1, xy2, color=None):
-        x1, y1 = xy1
-        x2, y2 = xy2
         return Wireframe(
             oid,
-            coordinates=[
-                Coordinate(x1, y1),
-                Coordinate(x2, y2),
-            ],
+            coordinates=np.array([
+                [*_unpack(xy1), 1],
+                [*_unpack(xy2), 1],
+            ]),
             color=color,
         )
 
@@ -100,9 +182,9 @@ class Wireframe:
     def point(oid, x, y, color=None):
         return Wireframe(
             oid,
-            coordinates=[
-                Coordinate(x, y),
-            ],
+            coordinates=np.array([
+                [x, y, 1],
+            ]),
             color=color,
         )
 
@@ -119,40 +201,44 @@ class Wireframe:
 
         return Wireframe(
             oid,
-            coordinates=[
-                Coordinate(minx, miny),
-                Coordinate(maxx, miny),
-                Coordinate(maxx, maxy),
-                Coordinate(minx, maxy),
-                Coordinate(minx, miny),
-            ],
+            coordinates=np.array([
+                [minx, miny, 1],
+                [maxx, miny, 1],
+                [maxx, maxy, 1],
+                [minx, maxy, 1],
+                [minx, miny, 1],
+            ]),
             color=color,
         )
 
     @property
     def is_closed(self) -> bool:
-        return self.coordinates[0] == self.coordinates[-1]
+        return (self._vertices[0] == self._vertices[-1]).all()
 
     @property
     def center(self) -> Coordinate:
-        cx = 0
-        cy = 0
-
-        for c in self.coordinates:
-            cx += c.x
-            cy += c.y
+        if self._centroid is None:
+            self._centroid = self._vertices.mean(axis=0)
 
-        cx /= len(self.coordinates)
-        cy /= len(self.coordinates)
+        centroid = self._centroid
+        if self._transformation is not None:
+            centroid = centroid @ self._transformation
 
+        cx, cy, _ = centroid
         return Coordinate(cx, cy)
 
     @property
     def lines(self) -> List[Tuple[Coordinate, Coordinate]]:
-        return list(zip(self.coordinates, self.coordinates[1:]))
+        coordinates = self.coordinates
+        return list(zip(coordinates, coordinates[1:]))
 
-    def _apply_transformation(self, t):
-        return self.copy(coordinates=[c @ t for c in self.coordinates])
+    def __repr__(self):
+        return f'{type(self).__name__}(id={self.id!r}, coordinates={self.coordinates}, color={self.color})'
+
+    def transform(self, t: np.ndarray):
+        new = copy(self)
+        new._transformation = t if self._transformation is None else self._transformation @ t
+        return new
 
     def translate(self, delta: 'Delta'):
         t = np.array([
@@ -161,7 +247,7 @@ class Wireframe:
             [delta.x, delta.y, 1],
         ])
 
-        return self._apply_transformation(t)
+        return self.transform(t)
 
     def scale(self, delta: 'Delta'):
         center = self.center
@@ -184,7 +270,7 @@ class Wireframe:
             [center.x, center.y, 1],
         ])
 
-        return self._apply_transformation(t_origin @ scale @ t_back)
+        return self.transform(t_origin @ scale @ t_back)
 
     def rotate_on_world(self, theta: float):
         return self.rotate_on_coordinate(Coordinate(0, 0), theta)
@@ -211,47 +297,111 @@ class Wireframe:
             [coordinate.x, coordinate.y, 1],
         ])
 
-        return self._apply_transformation(t_origin @ rotate @ t_back)
+        return self.transform(t_origin @ rotate @ t_back)
 
 
 class Curve(Wireframe):
-    def curve(self, n=50):
+    tessellation_cache = TessellationCache()
+
+    def curve(self, n: int = None, tolerance: float = FLATNESS_TOLERANCE):
+        if n is None:
+            n = self.adaptive_n(tolerance)
+
+        # curves are affine invariant, so the untransformed control points are sampled and
+        # the pending transformation (e.g. the viewport's) is applied to the samples instead
+        vertices = self._vertices
+        transformation = self._transformation
+
+        key = (self._tessellation_key(), vertices.tobytes(), n)
+        samples = self.tessellation_cache.get(key)
+
+        if samples is None:
+            samples = _as_vertices(self._tessellate(vertices, n), owned=True)
+            self.tessellation_cache.put(key, samples)
+
+        polyline = Wireframe(self.id, samples, self.color)
+
+        if transformation is not None:
+            polyline = polyline.transform(transformation)
+
+        return polyline
+
+    def adaptive_n(self, tolerance: float = FLATNESS_TOLERANCE) -> int:
+        # the control points as they will be drawn, which is in pixels during rendering
+        control_points = self._vertices
+        if self._transformation is not None:
+            control_points = control_points @ self._transformation
+
+        # a polyline of k uniform steps strays at most max|C''| / (8 k^2) from the curve
+        steps = sqrt(self._second_derivative_bound(control_points) / (8 * tolerance))
+
+        # rounded up to a power of two so that small zoom changes still hit the cache
+        return min(2 ** ceil(log2(max(steps, 1))), MAX_STEPS)
+
+    def _second_derivative_bound(self, control_points: np.ndarray) -> float:
         raise NotImplementedError
 
+    def _tessellation_key(self):
+        return type(self)
 
-@dataclass
-class Bezier(Curve):
-    def curve(self, n=50):
-        points = np.array([(c.x, c.y) for c in self.coordinates], dtype=float)
+    def _tessellate(self, vertices: np.ndarray, n: int) -> np.ndarray:
+        raise NotImplementedError
 
-        bezier_points = [self._bezier(t, points) for t in np.linspace(0, 1, num=n)]
 
-        return self.copy(
-            coordinates=bezier_points
-        )
+class Bezier(Curve):
+    def __init__(self,
+                 id: str,
+                 coordinates: Union[Sequence[Coordinate], np.ndarray] = (),
+                 color: Color = None,
+                 degree: int = 3,
+                 bounds: Tuple[Coordinate, Coordinate] = None):
+        super().__init__(id, coordinates, color, bounds)
+        self.degree = degree
+
+        if degree < 1:
+            raise ValueError(f'Bezier {id!r} has degree {degree}, it must be at least 1')
+
+        if not self.is_valid_point_count(len(self._vertices), degree):
+            raise ValueError(f'Bezier {id!r} of degree {degree} needs {degree}n+1 points, '
+                             f'got {len(self._vertices)}')
 
     @staticmethod
-    def _bezier(t, p):
-        blending_functions = np.array([
-            (1 - t) ** 3,
-            3 * (1 - t) ** 2 * t,
-            3 * (1 - t) * t ** 2,
-            t ** 3,
-        ])
+    def is_valid_point_count(count: int, degree: int = 3) -> bool:
+        # consecutive segments share their end points: degree * segments + 1 points
+        return count > degree and (count - 1) % degree == 0
 
-        c = blending_functions.dot(p)
+    def adaptive_n(self, tolerance: float = FLATNESS_TOLERANCE) -> int:
+        # n counts samples per segment here, not steps
+        return super().adaptive_n(tolerance) + 1
 
-        return Coordinate(c[0], c[1])
+    def _second_derivative_bound(self, control_points: np.ndarray) -> float:
+        return self.degree * (self.degree - 1) * _max_second_difference(control_points)
+
+    def _tessellation_key(self):
+        return type(self), self.degree
+
+    def _tessellate(self, vertices: np.ndarray, n: int) -> np.ndarray:
+        degree = self.degree
+        segments = (len(vertices) - 1) // degree
+
+        # (segments, degree + 1, 3) control points, evaluated for every segment in one product
+        G = vertices[np.arange(segments)[:, None] * degree + np.arange(degree + 1)]
+        samples = _bezier_basis(degree, n) @ G
+
+        # the first sample of each segment repeats the last one of the previous segment
+        return np.concatenate([samples[0, :1], samples[:, 1:].reshape(-1, vertices.shape[-1])])
 
 
-@dataclass
 class Bspline(Curve):
-    def curve(self, n=50):
-        bspline_points = list(self.forward_differences(self.coordinates, n))
+    @staticmethod
+    def is_valid_point_count(count: int) -> bool:
+        return count >= 4
 
-        return self.copy(
-            coordinates=bspline_points
-        )
+    def _second_derivative_bound(self, control_points: np.ndarray) -> float:
+        return _max_second_difference(control_points)
+
+    def _tessellate(self, vertices: np.ndarray, n: int) -> np.ndarray:
+        return self.forward_differences(vertices, n)
 
     Mbs = np.array([
         [-1, 3, -3, 1],
@@ -261,38 +411,28 @@ class Bspline(Curve):
     ]) / 6
 
     @staticmethod
-    def forward_differences(points, n):
-        lp = len(points)
+    def forward_differences(points: np.ndarray, n: int) -> np.ndarray:
         delta = 1 / n
-        E = Matrix([
+        E = np.array([
             [0, 0, 0, 1],
             [delta ** 3, delta ** 2, delta, 0],
             [6 * delta ** 3, 2 * delta ** 2, 0, 0],
             [6 * delta ** 3, 0, 0, 0],
         ])
 
-        for i in range(0, lp - 3):
-            yield from Bspline._forward_differences(points[i:i + 4], n, E)
-
-    @staticmethod
-    def _forward_differences(points, n, E):
-        Gx = Matrix([p.x for p in points])
-        Gy = Matrix([p.y for p in points])
-
-        Cx = Bspline.Mbs * Gx
-        Cy = Bspline.Mbs * Gy
+        # one (4, 3) geometry matrix per group of four consecutive control points
+        segments = len(points) - 3
+        G = points[np.arange(segments)[:, None] + np.arange(4)]
 
-        fx = E * Cx
-        fy = E * Cy
+        f = E @ Bspline.Mbs @ G
 
-        yield Coordinate(fx[0], fy[0])
+        # the forward difference steps are running sums, taken for all segments at once
+        steps = np.arange(n)[None, :, None]
+        f2 = f[:, None, 2] + steps * f[:, None, 3]
+        f1 = f[:, None, 1] + _exclusive_cumsum(f2)
+        f0 = f[:, None, 0] + _exclusive_cumsum(f1, include_total=True)
 
-        for _ in range(1, n + 1):
-            for k in range(len(fx) - 1):
-                fx[k] += fx[k + 1]
-                fy[k] += fy[k + 1]
-
-            yield Coordinate(fx[0], fy[0])
+        return f0.reshape(-1, points.shape[-1])
 
 
 @dataclass
@@ -377,3 +517,47 @@ def _unpack(xy):
     if isinstance(xy, Coordinate):
         return xy.x, xy.y
     return xy
+
+
+@lru_cache(maxsize=None)
+def _bezier_basis(degree: int, n: int) -> np.ndarray:
+    t = np.linspace(0, 1, num=n)
+
+    basis = np.column_stack([
+        factorial(degree) // (factorial(i) * factorial(degree - i)) * (1 - t) ** (degree - i) * t ** i
+        for i in range(degree + 1)
+    ])
+
+    basis.flags.writeable = False
+    return basis
+
+
+def _max_second_difference(points: np.ndarray) -> float:
+    if len(points) < 3:
+        return 0
+
+    d2 = points[:-2, :2] - 2 * points[1:-1, :2] + points[2:, :2]
+    return np.hypot(d2[:, 0], d2[:, 1]).max()
+
+
+def _exclusive_cumsum(a: np.ndarray, include_total: bool = False) -> np.ndarray:
+    sums = np.cumsum(a, axis=1)
+    if not include_total:
+        sums = sums[:, :-1]
+
+    return np.concatenate([np.zeros_like(a[:, :1]), sums], axis=1)
+
+
+def _as_vertices(coordinates, owned: bool = False) -> np.ndarray:
+    # arrays the caller can still write to are copied, unless they were just created here
+    if isinstance(coordinates, np.ndarray):
+        if owned or not coordinates.flags.writeable:
+            vertices = np.asarray(coordinates, dtype=float).reshape(-1, 3)
+        else:
+            vertices = np.array(coordinates, dtype=float).reshape(-1, 3)
+    else:
+        vertices = np.array([c.v for c in coordinates], dtype=float).reshape(-1, 3)
+
+    # vertex arrays are shared between copies, so they must never change in place
+    vertices.flags.writeable = False
+    return vertices
@@ -0,0 +1,255 @@
+import argparse
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from copy import copy
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+import cairo
+import numpy as np
+
+from src.clipping import Clipper
+from src.colors import Color
+from src.display_file import DisplayFile
+from src.drawing import Pencil
+from src.layers import GridLayer
+from src.model import Coordinate, Size, Wireframe
+from src.scene import load_scene
+from src.viewport import Viewport
+
+FORMATS = ('png', 'svg')
+
+TILE_SIZE = 512
+
+# scene shared by the tiles rendered in each worker process
+_worker_df: Optional[DisplayFile] = None
+
+
+def render(pencil: Pencil, df: DisplayFile, vp: Viewport, grid_layer: Optional[GridLayer] = None):
+    if grid_layer is None:
+        GridLayer().draw(pencil, vp)
+    else:
+        grid_layer.paint(pencil, vp)
+
+    pencil.line_width(1.5)
+
+    clipper = Clipper(vp.cmin, vp.cmax)
+
+    visible_wireframes = df.query(*vp.world_bounds)
+    transformed_wireframes = vp.transform_wireframes(visible_wireframes)
+
+    pencil.draw_wireframes(clipper.clip_all(transformed_wireframes))
+
+
+def draw_clipping_square(pencil: Pencil, vp: Viewport):
+    clipping_square = Wireframe.square(
+        'clipping_square',
+        vp.cmin,
+        vp.cmax,
+        color=Color(1, 0.5, 0),
+    )
+
+    pencil.draw_wireframe(clipping_square)
+
+
+def tile_pool(df: DisplayFile, workers: Optional[int] = None) -> ProcessPoolExecutor:
+    # the scene is sent once, when each worker starts, and reused for every tile and view
+    return ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(df.wireframes,))
+
+
+def render_tiled(pool: ProcessPoolExecutor, vp: Viewport, tile_size: int = TILE_SIZE) -> cairo.ImageSurface:
+    width = int(vp.vmax.x)
+    height = int(vp.vmax.y)
+
+    # only the view travels with each tile
+    vp = copy(vp)
+    vp.on_changed = None
+
+    tiles = [
+        (vp, (x, y, min(tile_size, width - x), min(tile_size, height - y)))
+        for y in range(0, height, tile_size)
+        for x in range(0, width, tile_size)
+    ]
+
+    surface = cairo.ImageSurface(cairo.FORMAT_RGB24, width, height)
+    surface.flush()
+    pixels = np.ndarray((height, surface.get_stride()), np.uint8, buffer=surface.get_data())
+
+    for (_, (x, y, w, h)), (stride, data) in zip(tiles, pool.map(_render_tile, tiles)):
+        tile = np.frombuffer(data, np.uint8).reshape(h, stride)
+        pixels[y:y + h, 4 * x:4 * (x + w)] = tile[:, :4 * w]
+
+    surface.mark_dirty()
+    return surface
+
+
+def _init_worker(wireframes: List[Wireframe]):
+    global _worker_df
+
+    _worker_df = DisplayFile()
+    _worker_df.add_many(wireframes)
+
+
+def _render_tile(task: Tuple[Viewport, Tuple[int, int, int, int]]) -> Tuple[int, bytes]:
+    vp, (x, y, width, height) = task
+
+    surface = cairo.ImageSurface(cairo.FORMAT_RGB24, width, height)
+    # draw in output coordinates, cairo shifts them into the tile
+    surface.set_device_offset(-x, -y)
+
+    pencil = Pencil(surface)
+    tile_vp = vp.tile(x, y, width, height)
+
+    if tile_vp.is_clipped_out:
+        pencil.ctx.set_source_rgb(1, 1, 1)
+        pencil.ctx.paint()
+    else:
+        render(pencil, _worker_df, tile_vp)
+
+    draw_clipping_square(pencil, vp)
+
+    surface.flush()
+    return surface.get_stride(), bytes(surface.get_data())
+
+
+def render_to_file(df: DisplayFile, vp: Viewport, path: Path, tile_size: Optional[int] = None,
+                   pool: Optional[ProcessPoolExecutor] = None):
+    width = int(vp.vmax.x)
+    height = int(vp.vmax.y)
+
+    if path.suffix == '.svg':
+        surface = cairo.SVGSurface(str(path), width, height)
+    elif tile_size is not None:
+        if pool is None:
+            with tile_pool(df) as pool:
+                surface = render_tiled(pool, vp, tile_size)
+        else:
+            surface = render_tiled(pool, vp, tile_size)
+
+        surface.write_to_png(str(path))
+        return
+    else:
+        surface = cairo.ImageSurface(cairo.FORMAT_RGB24, width, height)
+
+    pencil = Pencil(surface)
+    render(pencil, df, vp)
+    draw_clipping_square(pencil, vp)
+
+    if path.suffix == '.svg':
+        surface.finish()
+    else:
+        surface.write_to_png(str(path))
+
+
+def make_viewport(size: Size, view: Optional[Tuple[float, ...]] = None) -> Viewport:
+    vp = Viewport(size=size, on_changed=None)
+
+    if view is not None:
+        x0, y0, x1, y1, *angle = view
+        vp.wmin = Coordinate(x0, y0)
+        vp.wmax = Coordinate(x1, y1)
+        vp.angle = angle[0] if angle else 0
+
+    return vp
+
+
+def parse_view(text: str) -> Tuple[float, ...]:
+    values = tuple(float(v) for v in text.replace(',', ' ').split())
+
+    if len(values) not in (4, 5):
+        raise argparse.ArgumentTypeError(f'expected "xmin,ymin,xmax,ymax[,angle]", got {text!r}')
+
+    return values
+
+
+def parse_size(text: str) -> Size:
+    try:
+        width, height = (int(v) for v in text.lower().split('x'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'expected WIDTHxHEIGHT, got {text!r}')
+
+    return Size(width, height)
+
+
+def read_views(path: Path) -> List[Tuple[float, ...]]:
+    return [
+        parse_view(line)
+        for line in path.read_text().splitlines()
+        if line.strip() and not line.startswith('#')
+    ]
+
+
+def output_names(scenes: List[Path]) -> List[str]:
+    # scenes sharing a stem (x.json and x.scene, a/x.json and b/x.json) get their
+    # position in the list appended, so no image overwrites another
+    stems = Counter(scene.stem for scene in scenes)
+    names = [
+        scene.stem if stems[scene.stem] == 1 else f'{scene.stem}-{i}'
+        for i, scene in enumerate(scenes)
+    ]
+
+    if len(set(names)) != len(names):
+        raise ValueError(f'Output names collide: {", ".join(n for n, c in Counter(names).items() if c > 1)}')
+
+    return names
+
+
+def render_all(scenes: Iterable[Path], views: List[Optional[Tuple[float, ...]]],
+               size: Size, output_dir: Path, fmt: str, tile_size: Optional[int] = None,
+               workers: Optional[int] = None) -> List[Path]:
+    scenes = list(scenes)
+    names = output_names(scenes)
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    written = []
+
+    for scene, name in zip(scenes, names):
+        df = load_scene(scene)
+        pool = tile_pool(df, workers) if tile_size is not None else None
+
+        try:
+            for i, view in enumerate(views):
+                path = output_dir / f'{name}_{i}.{fmt}'
+                render_to_file(df, make_viewport(size, view), path, tile_size, pool)
+                written.append(path)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Render scene files to images without a display')
+    parser.add_argument('scenes', nargs='+', type=Path, help='scene files')
+    parser.add_argument('--view', action='append', type=parse_view, default=[],
+                        help='window as "xmin,ymin,xmax,ymax[,angle]" (repeatable)')
+    parser.add_argument('--views', type=Path, help='file with one view per line')
+    parser.add_argument('--size', type=parse_size, default=Size(800, 600), help='output size, e.g. 800x600')
+    parser.add_argument('--format', choices=FORMATS, default='png')
+    parser.add_argument('-o', '--output-dir', type=Path, default=Path('.'))
+    parser.add_argument('--tiles', type=int, metavar='SIZE',
+                        help='render PNGs in SIZExSIZE tiles across worker processes')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='processes used by --tiles')
+    args = parser.parse_args()
+
+    if args.tiles is not None and args.format != 'png':
+        parser.error('--tiles only applies to png output')
+
+    try:
+        output_names(args.scenes)
+    except ValueError as e:
+        parser.error(str(e))
+
+    views = list(args.view)
+    if args.views is not None:
+        views.extend(read_views(args.views))
+
+    for path in render_all(args.scenes, views or [None], args.size, args.output_dir, args.format,
+                           args.tiles, args.workers):
+        print(path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,213 @@
+import json
+import mmap
+from pathlib import Path
+from typing import Dict, Union
+
+import numpy as np
+
+from src.colors import Color
+from src.display_file import DisplayFile
+from src.model import Bezier, Bspline, Coordinate, Wireframe
+from src.wavefront import load_obj, save_obj
+
+TYPES = {
+    'Wireframe': Wireframe,
+    'Bezier': Bezier,
+    'Bspline': Bspline,
+}
+
+# binary scenes: header, object table, utf-8 id strings and a single (N, 3) float64 vertex block
+BINARY_SUFFIX = '.scene'
+MAGIC = b'CGSCENE'
+VERSION = 1
+
+HEADER = np.dtype([
+    ('magic', 'S8'),
+    ('version', '<u4'),
+    ('current_id', '<u4'),
+    ('objects', '<u8'),
+    ('vertices', '<u8'),
+    ('strings', '<u8'),
+])
+
+OBJECT = np.dtype([
+    ('id_offset', '<u8'),
+    ('id_length', '<u4'),
+    ('type', 'u1'),
+    ('degree', 'u1'),
+    ('has_color', 'u1'),
+    ('padding', 'u1'),
+    ('color', '<f8', 4),
+    ('vertex_offset', '<u8'),
+    ('vertex_count', '<u8'),
+    ('extent', '<f8', (2, 3)),
+])
+
+TYPE_CODES = list(TYPES)
+
+
+def load_scene(path: Union[str, Path]) -> DisplayFile:
+    if Path(path).suffix == BINARY_SUFFIX:
+        return load_binary_scene(path)
+
+    if Path(path).suffix == '.obj':
+        return load_obj(path)
+
+    with open(path) as f:
+        scene = json.load(f)
+
+    df = DisplayFile()
+    df.add_many(_from_dict(o) for o in scene['objects'])
+    df.current_id = scene.get('current_id', len(df))
+
+    return df
+
+
+def save_scene(df: DisplayFile, path: Union[str, Path]):
+    if Path(path).suffix == BINARY_SUFFIX:
+        save_binary_scene(df, path)
+        return
+
+    if Path(path).suffix == '.obj':
+        save_obj(df, path)
+        return
+
+    scene = {
+        'current_id': df.current_id,
+        'objects': [_to_dict(w) for w in df],
+    }
+
+    with open(path, 'w') as f:
+        json.dump(scene, f)
+
+
+def load_binary_scene(path: Union[str, Path]) -> DisplayFile:
+    with open(path, 'rb') as f:
+        # the arrays below keep the mapping alive after the file is closed
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    header = np.frombuffer(buffer, HEADER, count=1)[0]
+    if header['magic'] != MAGIC or header['version'] != VERSION:
+        raise ValueError(f'{path} is not a version {VERSION} binary scene')
+
+    offset = HEADER.itemsize
+    table = np.frombuffer(buffer, OBJECT, count=header['objects'], offset=offset)
+
+    offset += table.nbytes
+    strings = bytes(buffer[offset:offset + header['strings']])
+
+    offset += _padded(header['strings'])
+    vertices = np.frombuffer(buffer, '<f8', count=3 * header['vertices'], offset=offset).reshape(-1, 3)
+
+    df = DisplayFile()
+    df.add_many(_from_row(row, strings, vertices) for row in table)
+    df.current_id = int(header['current_id'])
+
+    return df
+
+
+def save_binary_scene(df: DisplayFile, path: Union[str, Path]):
+    wireframes = df.wireframes
+    ids = [w.id.encode() for w in wireframes]
+
+    table = np.zeros(len(wireframes), OBJECT)
+    id_offset = 0
+    vertex_offset = 0
+
+    for row, w, oid in zip(table, wireframes, ids):
+        vertices = w.vertices
+        bmin, bmax = w.bounds
+
+        row['id_offset'] = id_offset
+        row['id_length'] = len(oid)
+        row['type'] = TYPE_CODES.index(type(w).__name__)
+        row['degree'] = getattr(w, 'degree', 0)
+        row['vertex_offset'] = vertex_offset
+        row['vertex_count'] = len(vertices)
+        row['extent'] = [[bmin.x, bmin.y, 1], [bmax.x, bmax.y, 1]]
+
+        if w.color is not None:
+            row['has_color'] = 1
+            row['color'] = w.color.to_list()
+
+        id_offset += len(oid)
+        vertex_offset += len(vertices)
+
+    header = np.array([(MAGIC, VERSION, df.current_id, len(table), vertex_offset, id_offset)], HEADER)
+    strings = b''.join(ids)
+
+    with open(path, 'wb') as f:
+        f.write(header.tobytes())
+        f.write(table.tobytes())
+        f.write(strings.ljust(_padded(len(strings)), b'\0'))
+
+        for w in wireframes:
+            f.write(np.ascontiguousarray(w.vertices, '<f8').tobytes())
+
+
+def _from_row(row: np.void, strings: bytes, vertices: np.ndarray) -> Wireframe:
+    oid = strings[row['id_offset']:row['id_offset'] + row['id_length']].decode()
+    if row['type'] >= len(TYPE_CODES):
+        raise ValueError(f'Unknown object type code {row["type"]} for object {oid!r}')
+
+    kind = TYPE_CODES[row['type']]
+    color = Color(*row['color'].tolist()) if row['has_color'] else None
+
+    start = row['vertex_offset']
+    coordinates = vertices[start:start + row['vertex_count']]
+    _check_geometry(oid, kind, len(coordinates))
+
+    # the stored bounds spare reading the vertices when the object is indexed
+    (xmin, ymin, _), (xmax, ymax, _) = row['extent'].tolist()
+    bounds = Coordinate(xmin, ymin), Coordinate(xmax, ymax)
+
+    if kind == 'Bezier':
+        return Bezier(oid, coordinates, color, degree=int(row['degree']), bounds=bounds)
+
+    return TYPES[kind](oid, coordinates, color, bounds=bounds)
+
+
+def _padded(size: int) -> int:
+    return (size + 7) // 8 * 8
+
+
+def _from_dict(o: Dict) -> Wireframe:
+    kind = o.get('type', 'Wireframe')
+    if kind not in TYPES:
+        raise ValueError(f'Unknown object type {kind!r} for object {o.get("id")!r}')
+
+    vertices = np.asarray(o['coordinates'], dtype=float).reshape(-1, 2)
+    vertices = np.hstack([vertices, np.ones((len(vertices), 1))])
+
+    color = Color(*o['color']) if o.get('color') is not None else None
+    degree = o.get('degree', 3)
+
+    _check_geometry(o.get('id'), kind, len(vertices))
+
+    if kind == 'Bezier':
+        return Bezier(str(o['id']), vertices, color, degree=degree)
+
+    return TYPES[kind](str(o['id']), vertices, color)
+
+
+def _check_geometry(oid, kind: str, count: int):
+    # Bezier point counts and degrees are checked by the Bezier constructor
+    if kind == 'Bspline' and not Bspline.is_valid_point_count(count):
+        raise ValueError(f'B-spline needs at least 4 points, got {count} for object {oid!r}')
+
+    if count < 1:
+        raise ValueError(f'Wireframe without points for object {oid!r}')
+
+
+def _to_dict(w: Wireframe) -> Dict:
+    o = {
+        'id': w.id,
+        'type': type(w).__name__,
+        'coordinates': w.vertices[:, :2].tolist(),
+        'color': w.color.to_list() if w.color is not None else None,
+    }
+
+    if isinstance(w, Bezier):
+        o['degree'] = w.degree
+
+    return o
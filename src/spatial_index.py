@@ -0,0 +1,103 @@
+from collections import defaultdict
+from math import floor
+from typing import Dict, Set, Tuple
+
+from src.model import Coordinate
+
+CELL_SIZE = 256
+MAX_CELLS = 64
+
+
+class SpatialIndex:
+    def __init__(self, cell_size: float = CELL_SIZE, max_cells: int = MAX_CELLS):
+        self.cell_size = cell_size
+        self.max_cells = max_cells
+
+        self._cells: Dict[Tuple[int, int], Set[str]] = defaultdict(set)
+        self._bounds: Dict[str, Tuple[float, float, float, float]] = {}
+
+        # objects spanning more than max_cells are always candidates instead
+        self._large: Set[str] = set()
+
+    def insert(self, oid: str, bmin: Coordinate, bmax: Coordinate):
+        if oid in self._bounds:
+            self.remove(oid)
+
+        if bmin.x > bmax.x or bmin.y > bmax.y:
+            # empty objects are never found by a query, so they are not indexed
+            return
+
+        bounds = (bmin.x, bmin.y, bmax.x, bmax.y)
+        self._bounds[oid] = bounds
+
+        cells = self._cell_range(*bounds)
+        if _count(cells) > self.max_cells:
+            self._large.add(oid)
+            return
+
+        for cell in _iter(cells):
+            self._cells[cell].add(oid)
+
+    def remove(self, oid: str):
+        bounds = self._bounds.pop(oid, None)
+
+        if bounds is None:
+            return
+
+        if oid in self._large:
+            self._large.discard(oid)
+            return
+
+        for cell in _iter(self._cell_range(*bounds)):
+            oids = self._cells[cell]
+            oids.discard(oid)
+            if len(oids) == 0:
+                del self._cells[cell]
+
+    def clear(self):
+        self._cells.clear()
+        self._bounds.clear()
+        self._large.clear()
+
+    def query(self, bmin: Coordinate, bmax: Coordinate) -> Set[str]:
+        cells = self._cell_range(bmin.x, bmin.y, bmax.x, bmax.y)
+
+        if _count(cells) > len(self._bounds):
+            candidates = self._bounds.keys()
+        else:
+            candidates = set(self._large)
+            for cell in _iter(cells):
+                candidates.update(self._cells.get(cell, ()))
+
+        return {
+            oid for oid in candidates
+            if _overlaps(self._bounds[oid], (bmin.x, bmin.y, bmax.x, bmax.y))
+        }
+
+    def __len__(self):
+        return len(self._bounds)
+
+    def _cell_range(self, xmin, ymin, xmax, ymax):
+        size = self.cell_size
+        return (
+            floor(xmin / size),
+            floor(ymin / size),
+            floor(xmax / size),
+            floor(ymax / size),
+        )
+
+
+def _count(cells):
+    cx0, cy0, cx1, cy1 = cells
+    return (cx1 - cx0 + 1) * (cy1 - cy0 + 1)
+
+
+def _iter(cells):
+    cx0, cy0, cx1, cy1 = cells
+    for cx in range(cx0, cx1 + 1):
+        for cy in range(cy0, cy1 + 1):
+            yield cx, cy
+
+
+def _overlaps(a, b):
+    return a[0] <= b[2] and a[2] >= b[0] and a[1] <= b[3] and a[3] >= b[1]
@@ -0,0 +1,62 @@
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+import numpy as np
+
+MAX_BYTES = 64 * 1024 * 1024
+
+
+class TessellationCache:
+    def __init__(self, max_bytes: int = MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._entries: 'OrderedDict[Tuple, np.ndarray]' = OrderedDict()
+
+    def get(self, key: Tuple) -> Optional[np.ndarray]:
+        samples = self._entries.get(key)
+
+        if samples is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return samples
+
+    def put(self, key: Tuple, samples: np.ndarray):
+        size = _size(key, samples)
+
+        if size > self.max_bytes:
+            return
+
+        if key in self._entries:
+            self.nbytes -= _size(key, self._entries.pop(key))
+
+        self._entries[key] = samples
+        self.nbytes += size
+
+        while self.nbytes > self.max_bytes:
+            old_key, old_samples = self._entries.popitem(last=False)
+            self.nbytes -= _size(old_key, old_samples)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+        self.nbytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __str__(self):
+        return (f'TessellationCache(entries={len(self)}, nbytes={self.nbytes}, hits={self.hits}, '
+                f'misses={self.misses}, evictions={self.evictions})')
+
+
+def _size(key: Tuple, samples: np.ndarray) -> int:
+    # keys embed the control point bytes, so they count towards the bound too
+    return samples.nbytes + sum(len(k) for k in key if isinstance(k, bytes))
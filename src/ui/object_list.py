@@ -0,0 +1,89 @@
+from typing import Dict, List, Optional
+
+from gi.repository import Gtk
+
+from src.display_file import Change
+from src.model import Bezier, Bspline, Wireframe
+
+PLACEHOLDER = '…'
+
+
+class ObjectList:
+    def __init__(self, tree_view: Gtk.TreeView):
+        self.tree_view = tree_view
+        self.store: Gtk.TreeStore = tree_view.get_model()
+
+        self._rows: Dict[str, Gtk.TreeIter] = {}
+        self._wireframes: Dict[str, Wireframe] = {}
+
+    def on_changed(self, change: Change, oid: Optional[str], wireframe: Optional[Wireframe]):
+        if change == Change.RESET:
+            self.store.clear()
+            self._rows.clear()
+            self._wireframes.clear()
+
+        elif change == Change.REMOVED:
+            self.store.remove(self._rows.pop(oid))
+            del self._wireframes[oid]
+
+        elif oid in self._rows:
+            row = self._rows[oid]
+            self._wireframes[oid] = wireframe
+            self.store.set_value(row, 1, _summary(wireframe))
+
+            expanded = self.tree_view.row_expanded(self.store.get_path(row))
+            old_children = self._children(row)
+
+            # the new children go in before the old ones are removed: a row that loses
+            # all of its children is collapsed by the tree view
+            if expanded:
+                self._fill(row, wireframe)
+            else:
+                self.store.append(row, [oid, PLACEHOLDER])
+
+            for child in old_children:
+                self.store.remove(child)
+
+        else:
+            row = self.store.append(None, [oid, _summary(wireframe)])
+            self._rows[oid] = row
+            self._wireframes[oid] = wireframe
+
+            # coordinates are only listed once the row is expanded
+            self.store.append(row, [oid, PLACEHOLDER])
+
+    def on_expand(self, tree_view, row, path):
+        child = self.store.iter_children(row)
+
+        if child is not None and self.store.get_value(child, 1) == PLACEHOLDER:
+            oid = self.store.get_value(row, 0)
+            self._fill(row, self._wireframes[oid])
+            self.store.remove(child)
+
+        return False
+
+    def _fill(self, row: Gtk.TreeIter, wireframe: Wireframe):
+        for i, c in enumerate(wireframe.coordinates):
+            self.store.append(row, [wireframe.id, f'C{i}: ({round(c.x)}, {round(c.y)})'])
+
+        center = wireframe.center
+        self.store.append(row, [wireframe.id, f'Center: ({round(center.x)}, {round(center.y)})'])
+
+    def _children(self, row: Gtk.TreeIter) -> List[Gtk.TreeIter]:
+        return [self.store.iter_nth_child(row, i) for i in range(self.store.iter_n_children(row))]
+
+
+def _summary(wireframe: Wireframe) -> str:
+    t = 'Polygon'
+
+    coord_len = len(wireframe.vertices)
+    if isinstance(wireframe, Bezier):
+        t = 'Bezier'
+    elif isinstance(wireframe, Bspline):
+        t = 'B-Spline'
+    elif coord_len == 1:
+        t = 'Point'
+    elif coord_len == 2:
+        t = 'Line'
+
+    return f'ID: {wireframe.id} - Type: {t}'
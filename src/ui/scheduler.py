@@ -0,0 +1,39 @@
+from typing import Callable
+
+from gi.repository import GLib
+
+
+class RefreshScheduler:
+    def __init__(self, refresh: Callable[[], None]):
+        self.refresh = refresh
+
+        self.requested = 0
+        self.performed = 0
+
+        self._source = None
+
+    @property
+    def dirty(self) -> bool:
+        return self._source is not None
+
+    def request(self):
+        self.requested += 1
+
+        # every request made before the idle source runs is served by the same refresh;
+        # HIGH_IDLE runs ahead of GTK's redraw, so the frame drawn is always up to date
+        if self._source is None:
+            self._source = GLib.idle_add(self._run, priority=GLib.PRIORITY_HIGH_IDLE)
+
+    def flush(self):
+        if self._source is not None:
+            GLib.source_remove(self._source)
+            self._run()
+
+    def _run(self):
+        self._source = None
+        self.performed += 1
+        self.refresh()
+        return GLib.SOURCE_REMOVE
+
+    def __str__(self):
+        return f'RefreshScheduler(requested={self.requested}, performed={self.performed})'
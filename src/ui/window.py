@@ -3,12 +3,15 @@ from typing import Optional
 
 import cairo
 
-from src.clipping import Clipper
 from src.colors import Color, Colors
 from src.display_file import DisplayFile
 from src.drawing import Pencil
+from src.layers import GridLayer
 from src.log import log
 from src.model import Bezier, Bspline, Coordinate, Direction, Size, Wireframe
+from src.render import draw_clipping_square, render
+from src.ui.object_list import ObjectList
+from src.ui.scheduler import RefreshScheduler
 from src.ui.transform_dialog import TransformDialogHandler, TransformResult
 from src.viewport import Viewport
 
@@ -17,9 +20,12 @@ class WindowHandler:
     def __init__(self, window, builder):
         self.window = window
         self.builder = builder
-        self.df = DisplayFile()
+        self.object_list = ObjectList(builder.get_object('wireframe_list'))
+        self.df = DisplayFile(on_changed=self.object_list.on_changed)
         self.vp: Optional[Viewport] = None
         self.surface = None
+        self.grid_layer = GridLayer()
+        self.refresh_scheduler = RefreshScheduler(self._refresh)
 
         self.creating_wireframe = None
         self.creating_type = AddWireframeType.WIREFRAME
@@ -31,14 +37,14 @@ class WindowHandler:
         width = drawing_area.get_allocated_width()
         height = drawing_area.get_allocated_height()
 
-        self.vp = Viewport(size=Size(width, height), on_changed=self._refresh)
+        self.vp = Viewport(size=Size(width, height), on_changed=self.refresh_scheduler.request)
 
         self.surface = window.create_similar_surface(
             cairo.CONTENT_COLOR,
             width,
             height,
         )
-        self._refresh()
+        self.refresh_scheduler.request()
         return True
 
     def on_press_drawing_area(self, drawing_area, event):
@@ -47,7 +53,7 @@ class WindowHandler:
         if self.creating_wireframe is not None:
             untransformed_click = self.vp.untransform_coordinate(click)
             self.creating_wireframe.append(untransformed_click)
-            self._refresh()
+            self.refresh_scheduler.request()
 
         return True
 
@@ -65,7 +71,7 @@ class WindowHandler:
             if len(self.creating_wireframe) != 0:
                 wireframe = None
                 if self.creating_type == AddWireframeType.BEZIER:
-                    if len(self.creating_wireframe) == 4:
+                    if Bezier.is_valid_point_count(len(self.creating_wireframe)):
                         wireframe = Bezier(
                             id=self.df.next_id(),
                             coordinates=self.creating_wireframe,
@@ -73,7 +79,7 @@ class WindowHandler:
                         )
 
                 elif self.creating_type == AddWireframeType.BSPLINE:
-                    if len(self.creating_wireframe) >= 4:
+                    if Bspline.is_valid_point_count(len(self.creating_wireframe)):
                         wireframe = Bspline(
                             id=self.df.next_id(),
                             coordinates=self.creating_wireframe,
@@ -93,7 +99,10 @@ class WindowHandler:
                 self.df.add(wireframe)
 
             self.creating_wireframe = None
-        self._refresh()
+        self.refresh_scheduler.request()
+
+    def on_expand_wireframe(self, tree_view, row, path):
+        return self.object_list.on_expand(tree_view, row, path)
 
     def on_change_type_pressed(self, *args):
         if self.creating_wireframe is not None:
@@ -122,14 +131,14 @@ class WindowHandler:
         except ValueError as e:
             print('transform error:', e)
 
-        self._refresh()
+        self.refresh_scheduler.request()
 
     def on_reset_pressed(self, *args):
         log(args)
         self.builder.get_object('add_wireframe_button').set_active(False)
         self.df.reset()
         self.vp.reset()
-        self._refresh()
+        self.refresh_scheduler.request()
 
     def on_drag_begin(self, *args):
         log(args)
@@ -169,38 +178,10 @@ class WindowHandler:
         self.vp.rotate_counterclockwise()
         log(self.vp)
 
-    def _clear_surface(self):
-        ctx = cairo.Context(self.surface)
-        ctx.set_source_rgb(1, 1, 1)
-        ctx.paint()
-
     def _refresh(self):
-        self._refresh_list()
-        self._clear_surface()
-
         pencil = Pencil(self.surface)
-        clipper = Clipper(self.vp.cmin, self.vp.cmax)
-
-        for wireframe in self.vp.get_grid():
-            clipped_wireframes = clipper.clip(wireframe)
-            for w in clipped_wireframes:
-                pencil.draw_wireframe(w)
 
-        origin = self.vp.transform_coordinate(Coordinate(0, 0))
-        if clipper.inside(origin):
-            pencil.line_width(10)
-            pencil.color(Color(0, 0, 0, 0.5))
-            pencil.draw_point(origin)
-
-        pencil.line_width(1.5)
-
-        for wireframe in self.df.wireframes:
-            transformed_wireframe = self.vp.transform_wireframe(wireframe)
-
-            clipped_wireframe = clipper.clip(transformed_wireframe)
-
-            for w in clipped_wireframe:
-                pencil.draw_wireframe(w)
+        render(pencil, self.df, self.vp, self.grid_layer)
 
         if self.creating_wireframe is not None:
             new_wireframe = Wireframe(
@@ -212,48 +193,10 @@ class WindowHandler:
             transformed_wireframe = self.vp.transform_wireframe(new_wireframe)
             pencil.draw_wireframe(transformed_wireframe)
 
-        clipping_square = Wireframe.square(
-            'clipping_square',
-            self.vp.cmin,
-            self.vp.cmax,
-            color=Color(1, 0.5, 0),
-        )
-
-        pencil.draw_wireframe(clipping_square)
+        draw_clipping_square(pencil, self.vp)
 
         self.window.queue_draw()
 
-    def _refresh_list(self):
-        wireframe_list = ['Objects:']
-
-        if len(self.df.wireframes) == 0:
-            wireframe_list = ['No objects', 'added yet']
-
-        for wireframe in self.df.wireframes:
-            t = 'Polygon'
-
-            coord_len = len(wireframe.coordinates)
-            if coord_len == 1:
-                t = 'Point'
-            elif coord_len == 2:
-                t = 'Line'
-
-            wireframe_list.extend([
-                '',
-                f'ID: {wireframe.id}',
-                f'Type: {t}',
-            ])
-
-            for i, c in enumerate(wireframe.coordinates):
-                wireframe_list.append(f'C{i}: ({round(c.x)}, {round(c.y)})')
-
-            center = wireframe.center
-            wireframe_list.append(f'Center: ({round(center.x)}, {round(center.y)})')
-
-        wireframe_list.append('')
-
-        self.builder.get_object('wireframe_list').set_text('\n'.join(wireframe_list))
-
 
 class AddWireframeType(Enum):
     WIREFRAME = 'Wireframe'
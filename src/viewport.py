@@ -1,8 +1,11 @@
+from copy import copy
 from dataclasses import dataclass
-from math import pi
-from typing import Callable, List
+from math import cos, pi, sin
+from typing import Callable, List, Tuple
 
-from src.colors import Colors
+import numpy as np
+
+from src.colors import Color, Colors
 from src.model import Coordinate, Delta, Size, Wireframe
 from src.utils import multiples_between
 
@@ -11,6 +14,10 @@ ROTATION_FACTOR = pi / 8
 
 CLIP_BOUNDARY = 10
 
+GRID_STEP = 100
+
+TILE_MARGIN = 4
+
 
 @dataclass
 class Viewport:
@@ -32,6 +39,60 @@ class Viewport:
     def reset(self):
         self.__init__(self.original_size, self.on_changed)
 
+    @property
+    def wmin(self) -> Coordinate:
+        return self._wmin
+
+    @wmin.setter
+    def wmin(self, value: Coordinate):
+        self._wmin = value
+        self._invalidate()
+
+    @property
+    def wmax(self) -> Coordinate:
+        return self._wmax
+
+    @wmax.setter
+    def wmax(self, value: Coordinate):
+        self._wmax = value
+        self._invalidate()
+
+    @property
+    def angle(self) -> float:
+        return self._angle
+
+    @angle.setter
+    def angle(self, value: float):
+        self._angle = value
+        self._invalidate()
+
+    @property
+    def matrix(self) -> np.ndarray:
+        if self._matrix is None:
+            self._matrix = self._world_to_viewport()
+        return self._matrix
+
+    @property
+    def inverse(self) -> np.ndarray:
+        if self._inverse is None:
+            self._inverse = np.linalg.inv(self.matrix)
+        return self._inverse
+
+    @property
+    def world_bounds(self) -> Tuple[Coordinate, Coordinate]:
+        # the clipping region mapped back to the world, which is rotated when angle != 0
+        corners = np.array([
+            [self.cmin.x, self.cmin.y, 1],
+            [self.cmax.x, self.cmin.y, 1],
+            [self.cmax.x, self.cmax.y, 1],
+            [self.cmin.x, self.cmax.y, 1],
+        ]) @ self.inverse
+
+        xmin, ymin, _ = corners.min(axis=0)
+        xmax, ymax, _ = corners.max(axis=0)
+
+        return Coordinate(xmin, ymin), Coordinate(xmax, ymax)
+
     @property
     def size(self) -> Size:
         return Size(self.wmax.x - self.wmin.x, self.wmax.y - self.wmin.y)
@@ -50,6 +111,21 @@ class Viewport:
             (self.vmin.y + self.vmax.y) / 2,
         )
 
+    def tile(self, x: int, y: int, width: int, height: int, margin: int = TILE_MARGIN) -> 'Viewport':
+        # same world to viewport mapping, but clipped to one tile of the output. The
+        # margin lets strokes that cross the tile edge be drawn fully on both sides
+        tile = copy(self)
+        tile.on_changed = None
+
+        tile.cmin = Coordinate(max(self.cmin.x, x - margin), max(self.cmin.y, y - margin))
+        tile.cmax = Coordinate(min(self.cmax.x, x + width + margin), min(self.cmax.y, y + height + margin))
+
+        return tile
+
+    @property
+    def is_clipped_out(self) -> bool:
+        return self.cmin.x >= self.cmax.x or self.cmin.y >= self.cmax.y
+
     def move_to_origin(self):
         size = self.original_size
         self.wmin = Coordinate((-size.width / 2) + CLIP_BOUNDARY, (-size.height / 2) + CLIP_BOUNDARY)
@@ -84,49 +160,78 @@ class Viewport:
         self._notify()
 
     def transform_wireframes(self, wireframes: List[Wireframe]) -> List[Wireframe]:
-        return [
-            w.copy(coordinates=self.transform_path(w.coordinates))
-            for w in wireframes
-        ]
+        matrix = self.matrix
+        return [w.transform(matrix) for w in wireframes]
 
     def transform_wireframe(self, wireframe: Wireframe) -> Wireframe:
-        return wireframe.copy(
-            coordinates=self.transform_path(wireframe.coordinates)
-        )
+        return wireframe.transform(self.matrix)
 
-    def transform_path(self, coordinates: List[Coordinate]):
-        return [self.transform_coordinate(c) for c in coordinates]
+    def transform_path(self, vertices: np.ndarray) -> np.ndarray:
+        return vertices @ self.matrix
 
     def transform_coordinate(self, coordinate: Coordinate) -> Coordinate:
-        coordinate = coordinate.rotate(self.wcenter, self.angle)
-
-        x = (coordinate.x - self.wmin.x) / (self.wmax.x - self.wmin.x) * (self.vmax.x - self.vmin.x)
-        y = (coordinate.y - self.wmin.y) / (self.wmax.y - self.wmin.y) * (self.vmax.y - self.vmin.y)
-
-        return Coordinate(x, y)
+        return Coordinate.from_array(coordinate.v @ self.matrix)
 
     def untransform_coordinate(self, coordinate: Coordinate) -> Coordinate:
-        coordinate = coordinate.rotate(self.vcenter, -self.angle)
+        return Coordinate.from_array(coordinate.v @ self.inverse)
+
+    def get_grid(self) -> List[Tuple[Color, np.ndarray]]:
+        size = self.size
 
-        x = coordinate.x / (self.vmax.x - self.vmin.x) * (self.wmax.x - self.wmin.x) + self.wmin.x
-        y = coordinate.y / (self.vmax.y - self.vmin.y) * (self.wmax.y - self.wmin.y) + self.wmin.y
+        left, right = self.wmin.x - size.width, self.wmax.x + size.width
+        top, bottom = self.wmin.y - size.height, self.wmax.y + size.height
 
-        return Coordinate(x, y)
+        ys = np.fromiter(multiples_between(top, bottom, GRID_STEP), dtype=float)
+        xs = np.fromiter(multiples_between(left, right, GRID_STEP), dtype=float)
 
-    def get_grid(self):
-        size = self.size
+        lines = np.stack([
+            np.column_stack([np.full_like(ys, left), ys, np.ones_like(ys)]),
+            np.column_stack([np.full_like(ys, right), ys, np.ones_like(ys)]),
+        ], axis=1)
 
-        lines = [
-            Wireframe.line('blue', (self.wmin.x - size.width, y), (self.wmax.x + size.width, y), Colors.blue)
-            for y in multiples_between(self.wmin.y - size.height, self.wmax.y + size.height, 100)
-        ]
+        columns = np.stack([
+            np.column_stack([xs, np.full_like(xs, top), np.ones_like(xs)]),
+            np.column_stack([xs, np.full_like(xs, bottom), np.ones_like(xs)]),
+        ], axis=1)
 
-        columns = [
-            Wireframe.line('red', (x, self.wmin.y - size.height), (x, self.wmax.y + size.height), Colors.red)
-            for x in multiples_between(self.wmin.x - size.width, self.wmax.x + size.width, 100)
+        # (L, 2, 2) screen space segments, every line mapped in a single product
+        return [
+            (Colors.blue, (lines @ self.matrix)[:, :, :2]),
+            (Colors.red, (columns @ self.matrix)[:, :, :2]),
         ]
 
-        return self.transform_wireframes(lines + columns)
+    def _world_to_viewport(self) -> np.ndarray:
+        wcenter = self.wcenter
+
+        t_origin = np.array([
+            [1, 0, 0],
+            [0, 1, 0],
+            [-wcenter.x, -wcenter.y, 1],
+        ])
+
+        rotate = np.array([
+            [cos(self.angle), -sin(self.angle), 0],
+            [sin(self.angle), cos(self.angle), 0],
+            [0, 0, 1],
+        ])
+
+        t_back = np.array([
+            [1, 0, 0],
+            [0, 1, 0],
+            [wcenter.x - self.wmin.x, wcenter.y - self.wmin.y, 1],
+        ])
+
+        normalize = np.array([
+            [(self.vmax.x - self.vmin.x) / (self.wmax.x - self.wmin.x), 0, 0],
+            [0, (self.vmax.y - self.vmin.y) / (self.wmax.y - self.wmin.y), 0],
+            [0, 0, 1],
+        ])
+
+        return t_origin @ rotate @ t_back @ normalize
+
+    def _invalidate(self):
+        self._matrix = None
+        self._inverse = None
 
     def _notify(self):
         if self.on_changed is not None:
@@ -0,0 +1,163 @@
+from itertools import islice
+from pathlib import Path
+from typing import BinaryIO, Callable, Iterable, Iterator, List, Optional, TextIO, Union
+
+import numpy as np
+
+from src.display_file import DisplayFile
+from src.model import Curve, Wireframe
+
+CHUNK_SIZE = 1024
+BLOCK_ROWS = 64 * CHUNK_SIZE
+
+# samples per curve segment on export, where there is no pixel size to adapt to
+EXPORT_CURVE_STEPS = 50
+
+# records that build objects, all other records (vt, vn, o, g, comments...) are skipped
+ELEMENTS = (b'p', b'l', b'f')
+
+
+def read_obj(f: BinaryIO) -> Iterator[np.ndarray]:
+    # vertices are parsed into a short list and packed into the array every CHUNK_SIZE
+    # vertices. Elements can index any earlier vertex, so those have to be kept
+    vertices = _VertexBuffer()
+    pending: List[float] = []
+
+    for line in f:
+        fields = line.split()
+
+        if not fields:
+            continue
+
+        record = fields[0]
+
+        if record == b'v':
+            pending.append(float(fields[1]))
+            pending.append(float(fields[2]))
+
+            if len(pending) >= 2 * CHUNK_SIZE:
+                vertices.extend(pending)
+                pending = []
+
+        elif record in ELEMENTS:
+            if pending:
+                vertices.extend(pending)
+                pending = []
+
+            count = len(vertices)
+            indices = [int(field.split(b'/', 1)[0]) for field in fields[1:]]
+            indices = [i - 1 if i > 0 else count + i for i in indices]
+
+            if record == b'f':
+                indices.append(indices[0])
+
+            if record == b'p':
+                yield from (vertices.take([i]) for i in indices)
+            else:
+                yield vertices.take(indices)
+
+
+def import_obj(f: BinaryIO, df: DisplayFile, chunk_size: int = CHUNK_SIZE,
+               on_progress: Callable[[int], None] = None) -> int:
+    elements = read_obj(f)
+    imported = 0
+
+    while True:
+        chunk = list(islice(elements, chunk_size))
+
+        if not chunk:
+            return imported
+
+        df.add_many(Wireframe(df.next_id(), vertices) for vertices in chunk)
+        imported += len(chunk)
+
+        if on_progress is not None:
+            on_progress(f.tell())
+
+
+def load_obj(path: Union[str, Path], df: Optional[DisplayFile] = None, chunk_size: int = CHUNK_SIZE,
+             on_progress: Callable[[int, int], None] = None) -> DisplayFile:
+    if df is None:
+        df = DisplayFile()
+
+    total = Path(path).stat().st_size
+
+    with open(path, 'rb') as f:
+        import_obj(f, df, chunk_size, None if on_progress is None else lambda done: on_progress(done, total))
+
+    return df
+
+
+def write_obj(wireframes: Iterable[Wireframe], f: TextIO):
+    # curves are written as the polylines they are drawn with
+    count = 0
+
+    for w in wireframes:
+        if isinstance(w, Curve):
+            w = w.curve(n=EXPORT_CURVE_STEPS)
+
+        vertices = w.vertices
+        n = len(vertices)
+
+        closed = n > 3 and w.is_closed
+        if closed:
+            vertices = vertices[:-1]
+            n -= 1
+
+        indices = ' '.join(str(i) for i in range(count + 1, count + n + 1))
+        record = 'f' if closed else 'p' if n == 1 else 'l'
+
+        f.write(f'o {w.id}\n')
+        f.writelines(f'v {x:.17g} {y:.17g} 0\n' for x, y, _ in vertices.tolist())
+        f.write(f'{record} {indices}\n')
+
+        count += n
+
+
+def save_obj(df: DisplayFile, path: Union[str, Path]):
+    with open(path, 'w') as f:
+        write_obj(df, f)
+
+
+class _VertexBuffer:
+    # fixed size blocks, so growing never copies the vertices read so far
+    def __init__(self, block_rows: int = BLOCK_ROWS):
+        self._block_rows = block_rows
+        self._blocks: List[np.ndarray] = []
+        self._count = 0
+
+    def extend(self, xy: List[float]):
+        xy = np.array(xy).reshape(-1, 2)
+
+        while len(xy) != 0:
+            row = self._count % self._block_rows
+            if row == 0:
+                self._blocks.append(np.ones((self._block_rows, 3)))
+
+            n = min(len(xy), self._block_rows - row)
+            self._blocks[-1][row:row + n, :2] = xy[:n]
+
+            self._count += n
+            xy = xy[n:]
+
+    def take(self, indices: List[int]) -> np.ndarray:
+        indices = np.array(indices)
+
+        if indices.min() < 0 or indices.max() >= self._count:
+            raise ValueError(f'Vertex index out of range, there are {self._count} vertices')
+
+        # indexing with an array copies, so the objects never share the blocks
+        blocks, rows = np.divmod(indices, self._block_rows)
+
+        if (blocks == blocks[0]).all():
+            return self._blocks[blocks[0]][rows]
+
+        out = np.empty((len(indices), 3))
+        for block in np.unique(blocks):
+            mask = blocks == block
+            out[mask] = self._blocks[block][rows[mask]]
+
+        return out
+
+    def __len__(self):
+        return self._count